@@ -10,10 +10,17 @@ import sys
 import time
 import json
 import logging
+import logging.handlers
+import queue
+import atexit
+import contextvars
 import asyncio
+import mmap
+import threading
 import schedule
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
+from contextlib import contextmanager
 from dataclasses import dataclass
 from urllib.parse import urljoin, urlparse
 
@@ -27,21 +34,183 @@ from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 from fake_useragent import UserAgent
 import pymongo
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 from redis import Redis
 from dotenv import load_dotenv
 
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
 # 加载环境变量
 load_dotenv()
 
 # 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('crawler.log'),
-        logging.StreamHandler()
-    ]
-)
+# 当前抓取上下文（平台/类别/关键词），在产生日志的线程里注入到每条记录
+_log_context: contextvars.ContextVar = contextvars.ContextVar('crawl_log_context', default={})
+
+@contextmanager
+def log_context(**fields):
+    """在代码块内为日志附加抓取上下文"""
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+class ContextFilter(logging.Filter):
+    """把抓取上下文写入日志记录"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+class LogSampler(logging.Filter):
+    """对重复的相同告警/错误限流：每个窗口内只放行前 burst 条，其余计数，窗口结束后汇总输出"""
+    
+    def __init__(self, burst: int = 10, interval: float = 60.0, level: int = logging.WARNING):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.level = level
+        self._lock = threading.Lock()
+        # (logger, 级别, 消息模板, 平台, 类别) -> [窗口开始时间, 已放行条数, 已省略条数]
+        self._windows: Dict[tuple, list] = {}
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.level:
+            return True
+        # 按未格式化的消息模板和抓取上下文归并，同一平台/类别下不同异常文本的同类错误视为重复
+        key = (record.name, record.levelno, str(record.msg),
+               getattr(record, 'platform', None), getattr(record, 'category', None))
+        now = record.created
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+    
+    def pop_suppressed(self, now: Optional[float] = None) -> List[tuple]:
+        """取出已结束窗口的省略计数；不传 now 时取出全部"""
+        pending = []
+        with self._lock:
+            for key, window in list(self._windows.items()):
+                if now is None or now - window[0] >= self.interval:
+                    del self._windows[key]
+                    if window[2]:
+                        pending.append((key, window[2]))
+        return pending
+    
+    def summary_records(self, now: Optional[float] = None) -> List[logging.LogRecord]:
+        """为省略计数生成带上下文的汇总记录"""
+        records = []
+        for (name, levelno, msg, platform, category), count in self.pop_suppressed(now):
+            record = logging.LogRecord(name, levelno, __file__, 0, "重复日志已省略: %s", (msg,), None)
+            record.platform = platform
+            record.category = category
+            record.suppressed = count
+            records.append(record)
+        return records
+
+class JsonFormatter(logging.Formatter):
+    """输出单行 JSON 结构化日志"""
+    
+    CONTEXT_FIELDS = ('platform', 'category', 'keyword', 'suppressed')
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for field in self.CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class ConsoleFormatter(logging.Formatter):
+    """控制台文本格式，附带省略计数"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', None)
+        if suppressed:
+            text += f" (省略 {suppressed} 次)"
+        return text
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """不在调用线程里格式化消息，格式化和 I/O 都交给监听线程"""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+def setup_logging(log_file: str = 'crawler.log', level: int = logging.INFO):
+    """配置非阻塞日志：热路径只入队，文件和控制台输出在后台线程完成"""
+    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler.setFormatter(JsonFormatter())
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(ConsoleFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    
+    sampler = LogSampler(
+        burst=int(os.getenv('CRAWLER_LOG_BURST', '10')),
+        interval=float(os.getenv('CRAWLER_LOG_SAMPLE_INTERVAL', '60'))
+    )
+    queue_handler = _LazyQueueHandler(queue.SimpleQueue())
+    # 先注入上下文，限流才能按平台/类别区分
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(sampler)
+    
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+    
+    listener = logging.handlers.QueueListener(
+        queue_handler.queue, file_handler, stream_handler, respect_handler_level=True
+    )
+    listener.start()
+    stopped = threading.Event()
+    
+    def report_suppressed():
+        """每个窗口周期输出一次已结束窗口的省略计数"""
+        while not stopped.wait(sampler.interval):
+            for record in sampler.summary_records(time.time()):
+                queue_handler.emit(record)
+    
+    reporter = threading.Thread(target=report_suppressed, name='log-sampler', daemon=True)
+    reporter.start()
+    
+    def shutdown():
+        """汇总省略计数并停止监听线程，可重复调用"""
+        if stopped.is_set():
+            return
+        stopped.set()
+        reporter.join()
+        # 汇总尚未输出的省略计数，然后排空队列
+        for record in sampler.summary_records():
+            queue_handler.emit(record)
+        listener.stop()
+        root.removeHandler(queue_handler)
+    
+    atexit.register(shutdown)
+    return shutdown
+
+shutdown_logging = setup_logging()
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -89,37 +258,38 @@ class TaobaoCrawler:
         items = []
         
         for keyword in keywords:
-            try:
-                # 构建搜索URL
-                search_url = f"{self.base_url}/search"
-                params = {
-                    'q': keyword,
-                    'sort': 'sale-desc',  # 按销量排序
-                    'filter': 'reserve_price[0,]',  # 价格过滤
-                    'tab': 'all'
-                }
+            with log_context(platform='taobao', category=category, keyword=keyword):
+                try:
+                    # 构建搜索URL
+                    search_url = f"{self.base_url}/search"
+                    params = {
+                        'q': keyword,
+                        'sort': 'sale-desc',  # 按销量排序
+                        'filter': 'reserve_price[0,]',  # 价格过滤
+                        'tab': 'all'
+                    }
+                
+                    response = self.session.get(search_url, params=params, headers=self.headers)
+                    response.raise_for_status()
+                
+                    # 解析搜索结果
+                    soup = BeautifulSoup(response.text, 'html.parser')
+                    product_cards = soup.find_all('div', class_='item')
                 
-                response = self.session.get(search_url, params=params, headers=self.headers)
-                response.raise_for_status()
-                
-                # 解析搜索结果
-                soup = BeautifulSoup(response.text, 'html.parser')
-                product_cards = soup.find_all('div', class_='item')
-                
-                for card in product_cards[:20]:  # 限制每个关键词最多20个商品
-                    try:
-                        item = self._parse_taobao_item(card, category)
-                        if item:
-                            items.append(item)
-                    except Exception as e:
-                        logger.error(f"解析淘宝商品失败: {e}")
-                        continue
+                    for card in product_cards[:20]:  # 限制每个关键词最多20个商品
+                        try:
+                            item = self._parse_taobao_item(card, category)
+                            if item:
+                                items.append(item)
+                        except Exception as e:
+                            logger.error("解析淘宝商品失败: %s", e)
+                            continue
                         
-                time.sleep(2)  # 避免请求过快
+                    time.sleep(2)  # 避免请求过快
                 
-            except Exception as e:
-                logger.error(f"淘宝搜索失败 {keyword}: {e}")
-                continue
+                except Exception as e:
+                    logger.error("淘宝搜索失败 %s: %s", keyword, e)
+                    continue
                 
         return items
     
@@ -180,7 +350,7 @@ class TaobaoCrawler:
             )
             
         except Exception as e:
-            logger.error(f"解析淘宝商品卡片失败: {e}")
+            logger.error("解析淘宝商品卡片失败: %s", e)
             return None
     
     def _extract_price(self, price_text: str) -> float:
@@ -289,37 +459,38 @@ class JDCrawler:
         items = []
         
         for keyword in keywords:
-            try:
-                # 构建搜索URL
-                search_url = f"{self.base_url}/Search"
-                params = {
-                    'keyword': keyword,
-                    'enc': 'utf-8',
-                    'wq': keyword,
-                    'pvid': str(int(time.time() * 1000))
-                }
+            with log_context(platform='jd', category=category, keyword=keyword):
+                try:
+                    # 构建搜索URL
+                    search_url = f"{self.base_url}/Search"
+                    params = {
+                        'keyword': keyword,
+                        'enc': 'utf-8',
+                        'wq': keyword,
+                        'pvid': str(int(time.time() * 1000))
+                    }
+                
+                    response = self.session.get(search_url, params=params, headers=self.headers)
+                    response.raise_for_status()
                 
-                response = self.session.get(search_url, params=params, headers=self.headers)
-                response.raise_for_status()
-                
-                # 解析搜索结果
-                soup = BeautifulSoup(response.text, 'html.parser')
-                product_items = soup.find_all('div', class_='gl-item')
-                
-                for item in product_items[:20]:  # 限制每个关键词最多20个商品
-                    try:
-                        hardware_item = self._parse_jd_item(item, category)
-                        if hardware_item:
-                            items.append(hardware_item)
-                    except Exception as e:
-                        logger.error(f"解析京东商品失败: {e}")
-                        continue
+                    # 解析搜索结果
+                    soup = BeautifulSoup(response.text, 'html.parser')
+                    product_items = soup.find_all('div', class_='gl-item')
+                
+                    for item in product_items[:20]:  # 限制每个关键词最多20个商品
+                        try:
+                            hardware_item = self._parse_jd_item(item, category)
+                            if hardware_item:
+                                items.append(hardware_item)
+                        except Exception as e:
+                            logger.error("解析京东商品失败: %s", e)
+                            continue
                         
-                time.sleep(2)  # 避免请求过快
+                    time.sleep(2)  # 避免请求过快
                 
-            except Exception as e:
-                logger.error(f"京东搜索失败 {keyword}: {e}")
-                continue
+                except Exception as e:
+                    logger.error("京东搜索失败 %s: %s", keyword, e)
+                    continue
                 
         return items
     
@@ -380,7 +551,7 @@ class JDCrawler:
             )
             
         except Exception as e:
-            logger.error(f"解析京东商品失败: {e}")
+            logger.error("解析京东商品失败: %s", e)
             return None
     
     def _extract_price(self, price_text: str) -> float:
@@ -468,15 +639,313 @@ class JDCrawler:
             return sku_match.group(1)
         return ""
 
+class SpoolLockedError(RuntimeError):
+    """预写日志目录已被其他进程占用"""
+
+class ItemSpool:
+    """本地追加写预写日志（按段顺序写入，已确认的段会被截断）"""
+    
+    SEGMENT_PREFIX = 'segment-'
+    SEGMENT_SUFFIX = '.log'
+    CHECKPOINT_FILE = 'checkpoint.json'
+    LOCK_FILE = 'spool.lock'
+    
+    def __init__(self, spool_dir: str, segment_max_bytes: int = 16 * 1024 * 1024,
+                 use_mmap: bool = False):
+        self.spool_dir = spool_dir
+        self.segment_max_bytes = segment_max_bytes
+        self.use_mmap = use_mmap
+        self._lock = threading.Lock()
+        os.makedirs(self.spool_dir, exist_ok=True)
+        # 多个定时任务可能同时启动，同一目录只允许一个进程写入和回放
+        self._acquire_lock()
+        
+        # 每次启动都开启新段，上次遗留的段（可能以崩溃时写了一半的记录结尾）视为已封存
+        segments = self.list_segments()
+        self._active_seq = segments[-1] + 1 if segments else 0
+        self._active_file = open(self._segment_path(self._active_seq), 'ab')
+    
+    def _acquire_lock(self):
+        """对目录加独占锁，已被占用时抛出 SpoolLockedError"""
+        self._lock_file = open(os.path.join(self.spool_dir, self.LOCK_FILE), 'a+b')
+        try:
+            if os.name == 'nt':
+                self._lock_file.seek(0)
+                msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            raise SpoolLockedError(f"预写日志目录 {self.spool_dir} 正被其他爬虫进程使用")
+    
+    def _release_lock(self):
+        """释放目录锁"""
+        if os.name == 'nt':
+            self._lock_file.seek(0)
+            msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+        self._lock_file.close()
+    
+    def _segment_path(self, seq: int) -> str:
+        """段文件路径"""
+        return os.path.join(self.spool_dir, f"{self.SEGMENT_PREFIX}{seq:08d}{self.SEGMENT_SUFFIX}")
+    
+    def list_segments(self) -> List[int]:
+        """按序号列出现有段"""
+        seqs = []
+        for name in os.listdir(self.spool_dir):
+            if name.startswith(self.SEGMENT_PREFIX) and name.endswith(self.SEGMENT_SUFFIX):
+                seqs.append(int(name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)]))
+        return sorted(seqs)
+    
+    def append(self, record: Dict[str, Any]):
+        """追加一条记录"""
+        line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+        with self._lock:
+            self._active_file.write(line)
+            # 只刷到操作系统缓冲区，不做 fsync，保持内存级写入速度
+            self._active_file.flush()
+            if self._active_file.tell() >= self.segment_max_bytes:
+                self._roll()
+    
+    def _roll(self):
+        """封存当前段并开启新段"""
+        os.fsync(self._active_file.fileno())
+        self._active_file.close()
+        self._active_seq += 1
+        self._active_file = open(self._segment_path(self._active_seq), 'ab')
+    
+    def is_sealed(self, seq: int) -> bool:
+        """段是否已封存（不会再被写入）"""
+        with self._lock:
+            return seq < self._active_seq
+    
+    def read_segment(self, seq: int, offset: int) -> List[tuple]:
+        """从偏移量开始读取段内完整的记录，返回 [(记录, 结束偏移量)]"""
+        path = self._segment_path(seq)
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= offset:
+                return []
+            if self.use_mmap:
+                # 直接在映射上逐行切片，不整体复制到内存
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return self._parse_lines(mm, offset, size, 0, path)
+            f.seek(offset)
+            data = f.read(size - offset)
+        return self._parse_lines(data, 0, len(data), offset, path)
+    
+    def _parse_lines(self, buf, start: int, end: int, base: int, path: str) -> List[tuple]:
+        """解析 buf[start:end] 中的完整行，base 为 buf 在文件中的起始偏移量"""
+        # 末尾未写完的半行留到下次读取
+        records = []
+        pos = start
+        end = buf.rfind(b'\n', start, end) + 1
+        while pos < end:
+            newline = buf.find(b'\n', pos, end)
+            line = buf[pos:newline]
+            pos = newline + 1
+            if not line.strip():
+                continue
+            try:
+                records.append((json.loads(line), base + pos))
+            except ValueError as e:
+                logger.error("跳过损坏的预写日志记录 %s@%d: %s", path, base + pos, e)
+        return records
+    
+    def load_checkpoint(self) -> Dict[str, int]:
+        """读取已确认位置"""
+        try:
+            with open(os.path.join(self.spool_dir, self.CHECKPOINT_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'segment': 0, 'offset': 0}
+    
+    def save_checkpoint(self, seq: int, offset: int):
+        """原子写入已确认位置"""
+        path = os.path.join(self.spool_dir, self.CHECKPOINT_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'segment': seq, 'offset': offset}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    def truncate(self, seq: int):
+        """删除已全部确认的封存段"""
+        if self.is_sealed(seq):
+            try:
+                os.remove(self._segment_path(seq))
+            except FileNotFoundError:
+                pass
+    
+    def truncate_active(self, seq: int, acked_offset: int):
+        """当前段已全部确认时清空它，避免已入库的数据一直留在磁盘上"""
+        with self._lock:
+            if seq != self._active_seq or acked_offset == 0 or self._active_file.tell() != acked_offset:
+                return
+            # 先回退检查点再清空文件：中途崩溃最多重放已入库的记录（upsert 幂等）
+            self.save_checkpoint(seq, 0)
+            self._active_file.truncate(0)
+            self._active_file.seek(0)
+    
+    def close(self):
+        """关闭当前段并释放目录锁"""
+        with self._lock:
+            self._active_file.flush()
+            os.fsync(self._active_file.fileno())
+            self._active_file.close()
+        self._release_lock()
+
+class SpoolDrainer:
+    """将预写日志批量回放到 MongoDB"""
+    
+    def __init__(self, spool: ItemSpool, collection, batch_size: int = 500,
+                 interval: float = 2.0):
+        self.spool = spool
+        self.collection = collection
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """启动后台回放线程"""
+        self._thread = threading.Thread(target=self._run, name='spool-drainer', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """停止后台线程，并尽量回放剩余数据"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+        self.drain()
+    
+    def _run(self):
+        """后台循环"""
+        while not self._stop_event.is_set():
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("预写日志回放失败，稍后重试")
+            self._stop_event.wait(self.interval)
+    
+    def drain(self) -> int:
+        """回放所有未确认的记录，返回成功写入的条数；数据库不可用时保留数据等待下次重试"""
+        checkpoint = self.spool.load_checkpoint()
+        drained = 0
+        
+        for seq in self.spool.list_segments():
+            if seq < checkpoint['segment']:
+                # 已确认但尚未删除的段（例如上次删除前中断）
+                self.spool.truncate(seq)
+                continue
+            offset = checkpoint['offset'] if seq == checkpoint['segment'] else 0
+            # 先判断是否封存再读取，避免漏掉读取后、封存前追加的记录
+            sealed = self.spool.is_sealed(seq)
+            records = self.spool.read_segment(seq, offset)
+            
+            # 结构不完整的记录无法入库，跳过并记录，避免卡住后续回放
+            operations = []
+            for record, end in records:
+                try:
+                    operations.append((self._to_operation(record), record.get('name'), end))
+                except Exception as e:
+                    logger.error("跳过无效的预写日志记录 %s@%d: %r", self.spool._segment_path(seq), end, e)
+            
+            for start in range(0, len(operations), self.batch_size):
+                batch = operations[start:start + self.batch_size]
+                acked = self._write_batch(batch)
+                if acked:
+                    offset = batch[acked - 1][2]
+                    self.spool.save_checkpoint(seq, offset)
+                    drained += acked
+                if acked < len(batch):
+                    return drained
+            
+            # 末尾被跳过的无效记录同样视为已确认
+            if records and records[-1][1] != offset:
+                offset = records[-1][1]
+                self.spool.save_checkpoint(seq, offset)
+            
+            if not sealed:
+                self.spool.truncate_active(seq, offset)
+                break
+            # 封存段已全部确认，推进检查点并截断
+            self.spool.save_checkpoint(seq + 1, 0)
+            self.spool.truncate(seq)
+        
+        return drained
+    
+    def _write_batch(self, batch: List[tuple]) -> int:
+        """以幂等 upsert 批量写入 [(操作, 商品名, 结束偏移量)]，返回已确认（含被跳过的坏数据）的条数"""
+        try:
+            self.collection.bulk_write([operation for operation, _, _ in batch], ordered=True)
+            return len(batch)
+        except BulkWriteError as e:
+            # 有序写入在第一条失败处停止：之前的已写入，失败的这条属于数据错误，跳过
+            write_errors = e.details.get('writeErrors')
+            if not write_errors:
+                logger.warning("批量写入未确认，%d 个商品保留在预写日志中: %s", len(batch), e)
+                return 0
+            failed = write_errors[0]
+            index = failed['index']
+            logger.error("保存商品失败 %s: %s", batch[index][1], failed.get('errmsg'))
+            return index + 1
+        except PyMongoError as e:
+            logger.warning("数据库暂不可用，%d 个商品保留在预写日志中: %s", len(batch), e)
+            return 0
+    
+    def _to_operation(self, record: Dict[str, Any]) -> UpdateOne:
+        """将预写日志记录转换为 upsert 操作"""
+        spooled_at = datetime.fromtimestamp(record['spooledAt'])
+        updates = {
+            'price': record['price'],
+            'originalPrice': record['originalPrice'],
+            'stock': record['stock'],
+            'image': record['image'],
+            'updatedAt': spooled_at
+        }
+        on_insert = {
+            key: value for key, value in record.items()
+            if key not in updates and key != 'spooledAt'
+        }
+        on_insert['createdAt'] = spooled_at
+        
+        return UpdateOne(
+            {
+                'brand': record['brand'],
+                'model': record['model'],
+                'category': record['category']
+            },
+            {'$set': updates, '$setOnInsert': on_insert},
+            upsert=True
+        )
+
 class HardwareCrawler:
     """硬件数据爬虫主类"""
     
     def __init__(self):
+        # 初始化预写日志，抓取结果先落盘，再由后台线程批量写入数据库
+        # 先于数据库连接创建，目录被其他进程占用时直接退出
+        self.spool = ItemSpool(
+            os.getenv('CRAWLER_SPOOL_DIR', 'spool'),
+            segment_max_bytes=int(os.getenv('CRAWLER_SPOOL_SEGMENT_BYTES', str(16 * 1024 * 1024))),
+            use_mmap=os.getenv('CRAWLER_SPOOL_MMAP', 'false').lower() == 'true'
+        )
+        
         # 初始化数据库连接
         self.mongo_client = pymongo.MongoClient(os.getenv('MONGODB_URI', 'mongodb://localhost:27017/'))
         self.db = self.mongo_client['nerabuild']
         self.hardware_collection = self.db['hardware']
         
+        self.spool_drainer = SpoolDrainer(
+            self.spool,
+            self.hardware_collection,
+            batch_size=int(os.getenv('CRAWLER_SPOOL_BATCH_SIZE', '500'))
+        )
+        
         # 初始化Redis连接
         self.redis_client = Redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/'))
         
@@ -499,17 +968,25 @@ class HardwareCrawler:
     def crawl_all_hardware(self):
         """爬取所有硬件数据"""
         logger.info("开始爬取硬件数据...")
+        self.spool_drainer.start()
         
+        try:
+            self._crawl_categories()
+        finally:
+            self.spool_drainer.stop()
+    
+    def _crawl_categories(self):
+        """逐个类别爬取"""
         for category, keywords in self.hardware_keywords.items():
-            logger.info(f"爬取 {category} 类别...")
+            logger.info("爬取 %s 类别...", category)
             
             # 爬取淘宝数据
             taobao_items = self.taobao_crawler.search_hardware(category, keywords)
-            logger.info(f"淘宝 {category}: 找到 {len(taobao_items)} 个商品")
+            logger.info("淘宝 %s: 找到 %d 个商品", category, len(taobao_items))
             
             # 爬取京东数据
             jd_items = self.jd_crawler.search_hardware(category, keywords)
-            logger.info(f"京东 {category}: 找到 {len(jd_items)} 个商品")
+            logger.info("京东 %s: 找到 %d 个商品", category, len(jd_items))
             
             # 合并数据并去重
             all_items = taobao_items + jd_items
@@ -518,7 +995,7 @@ class HardwareCrawler:
             # 保存到数据库
             self._save_items(unique_items)
             
-            logger.info(f"{category} 类别完成，保存 {len(unique_items)} 个商品")
+            logger.info("%s 类别完成，保存 %d 个商品", category, len(unique_items))
             
             # 避免请求过快
             time.sleep(5)
@@ -538,7 +1015,7 @@ class HardwareCrawler:
         return unique_items
     
     def _save_items(self, items: List[HardwareItem]):
-        """保存商品到数据库"""
+        """保存商品到预写日志，由后台线程写入数据库"""
         for item in items:
             try:
                 # 转换为字典格式
@@ -555,37 +1032,13 @@ class HardwareCrawler:
                     'specs': item.specs,
                     'platform': item.platform,
                     'model3D': self._generate_3d_config(item),
-                    'createdAt': datetime.now(),
-                    'updatedAt': datetime.now()
+                    'spooledAt': time.time()
                 }
                 
-                # 检查是否已存在
-                existing = self.hardware_collection.find_one({
-                    'brand': item.brand,
-                    'model': item.model,
-                    'category': item.category
-                })
-                
-                if existing:
-                    # 更新现有记录
-                    self.hardware_collection.update_one(
-                        {'_id': existing['_id']},
-                        {
-                            '$set': {
-                                'price': item.price,
-                                'originalPrice': item.original_price,
-                                'stock': item.stock,
-                                'image': item.image,
-                                'updatedAt': datetime.now()
-                            }
-                        }
-                    )
-                else:
-                    # 插入新记录
-                    self.hardware_collection.insert_one(item_dict)
+                self.spool.append(item_dict)
                     
             except Exception as e:
-                logger.error(f"保存商品失败 {item.name}: {e}")
+                logger.error("保存商品失败 %s: %s", item.name, e, extra={'category': item.category})
                 continue
     
     def _generate_3d_config(self, item: HardwareItem) -> Dict[str, Any]:
@@ -670,16 +1123,23 @@ class HardwareCrawler:
 
 def main():
     """主函数"""
-    crawler = HardwareCrawler()
+    try:
+        crawler = HardwareCrawler()
+    except SpoolLockedError as e:
+        logger.warning("跳过本次爬取: %s", e)
+        shutdown_logging()
+        return
     
     try:
         crawler.crawl_all_hardware()
         logger.info("硬件数据爬取完成！")
     except Exception as e:
-        logger.error(f"爬取失败: {e}")
+        logger.error("爬取失败: %s", e)
     finally:
+        crawler.spool.close()
         crawler.mongo_client.close()
         crawler.redis_client.close()
+        shutdown_logging()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file